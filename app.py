@@ -144,7 +144,7 @@ def run():
         st.title("💰 Debts & Loans")
 
         def fetch_debts():
-            expected_cols = ["person", "amount", "type", "due_date", "notes"]
+            expected_cols = ["id", "person", "amount", "type", "due_date", "notes"]
             try:
                 response = requests.get(f"{BASE_URL}/debts")
                 if response.status_code == 200:
@@ -161,9 +161,10 @@ def run():
             return pd.DataFrame(columns=expected_cols)
 
         debts_df = fetch_debts()
-        total_owe = debts_df[debts_df["type"] == "owe"]["amount"].sum()
-        total_owed = debts_df[debts_df["type"] == "owed"]["amount"].sum()
-        net_balance = total_owed - total_owe
+        balances = fetch_data("debts/balances") or {}
+        total_owe = balances.get("owe", 0)
+        total_owed = balances.get("owed", 0)
+        net_balance = balances.get("net", 0)
 
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -206,12 +207,18 @@ def run():
     # ------------------- 3. Future Payments ------------------- #
     elif menu == "Future Payments":
         st.title("⏰ Future Payments")
+        window = st.slider("Show payments due in the next N days", 1, 90, 30)
         try:
-            reminders = requests.get(f"{BASE_URL}/reminders").json()
+            overdue = requests.get(f"{BASE_URL}/reminders", params={"overdue": True}).json()
+            reminders = requests.get(f"{BASE_URL}/reminders", params={"days": window}).json()
         except Exception as e:
-            reminders = []
+            overdue, reminders = [], []
             st.error(f"Error fetching reminders: {e}")
 
+        if overdue:
+            st.subheader("⚠️ Overdue Payments")
+            st.table(pd.DataFrame(overdue))
+
         reminders_df = pd.DataFrame(reminders)
         st.subheader("📌 Upcoming Payments")
         if not reminders_df.empty:
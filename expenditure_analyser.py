@@ -8,7 +8,7 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import json
 
 # ---------- Configuration: Regex-based categorization rules ----------
@@ -114,27 +114,46 @@ def detect_anomalies(df: pd.DataFrame) -> dict:
 
 
 # ---------- Plotting (Matplotlib only, no styles/colors specified) ----------
-def plot_category_pie(by_cat: pd.DataFrame, save_path: Path, title: str="Expenses by Category"):
+# Charts are drawn on explicit Figure/Axes objects rather than the pyplot state
+# machine, so they are safe to render headless and from several processes.
+def draw_category_pie(ax, by_cat: pd.DataFrame, title: str="Expenses by Category"):
+    ax.pie(by_cat["AbsAmount"], labels=by_cat["Category"], autopct="%1.1f%%", startangle=90,labeldistance=1.1,pctdistance=0.8)
+    ax.set_title(title)
+    ax.axis("equal")
+
+def draw_monthly_bar(ax, monthly: pd.DataFrame, title: str="Monthly Expenses", month_format: str="%Y-%m"):
+    # summarize_monthly_trends produces "AbsAmount"; older callers passed "expense"
+    values = monthly["expense"] if "expense" in monthly.columns else monthly["AbsAmount"]
+    labels = [pd.Timestamp(m).strftime(month_format) for m in monthly["Month"]]
+    ax.bar(labels, values)
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.set_ylabel("Expense")
+    ax.set_title(title)
+
+def draw_category_trends(ax, trends: pd.DataFrame, title: str="Monthly Expenses by Category", month_format: str="%Y-%m"):
+    # trends: one row per month, one column per category
+    labels = [pd.Timestamp(m).strftime(month_format) for m in trends.index]
+    for cat in trends.columns:
+        ax.plot(labels, trends[cat].to_numpy(), marker="o", label=str(cat))
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.set_ylabel("Expense")
+    ax.set_title(title)
+    ax.legend(fontsize="small")
+
+def plot_category_pie(by_cat: pd.DataFrame, save_path: Path, title: str="Expenses by Category", dpi: int=200):
     if by_cat.empty:
         return
-    plt.figure()
-    plt.pie(by_cat["AbsAmount"], labels=by_cat["Category"], autopct="%1.1f%%", startangle=90,labeldistance=1.1,pctdistance=0.8)
-    plt.title(title)
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=200)
-    plt.axis("equal")
-    plt.close()
-
-def plot_monthly_bar(monthly: pd.DataFrame, save_path: Path, title: str="Monthly Expenses", month_format: str="%Y-%m"):
+    fig = Figure()
+    draw_category_pie(fig.add_subplot(), by_cat, title)
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=dpi)
+
+def plot_monthly_bar(monthly: pd.DataFrame, save_path: Path, title: str="Monthly Expenses", month_format: str="%Y-%m", dpi: int=200):
     if monthly.empty:
         return
-    plt.figure()
-    labels = [m.strftime(month_format) for m in monthly["Month"]]
-    plt.bar(labels, monthly["expense"])
-    plt.xticks(rotation=45, ha="right")
-    plt.ylabel("Expense")
-    plt.title(title)
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=200)
-    plt.close()
- 
\ No newline at end of file
+    fig = Figure()
+    draw_monthly_bar(fig.add_subplot(), monthly, title, month_format)
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=dpi)
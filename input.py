@@ -21,7 +21,11 @@ if not st.session_state.is_analyzed:
         files = {"file": uploaded_file.getvalue()}
         response = requests.post(f"{BASE_URL}/upload_pdf", files=files)
         if response.status_code == 200:
-            st.success("✅ PDF uploaded & processed successfully!")
+            result = response.json()
+            st.success(f"✅ PDF uploaded & processed successfully! "
+                       f"{result.get('num_new', 0)} new, {result.get('num_skipped', 0)} already imported.")
+            if result.get("num_malformed"):
+                st.warning(f"⚠️ {result['num_malformed']} line(s) could not be parsed.")
         else:
             st.error("❌ Failed to process PDF.")
 
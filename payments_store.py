@@ -0,0 +1,195 @@
+"""
+In-memory indexes over debts and reminders (future payments).
+
+A store is loaded once from the rows in shared storage and never modified
+afterwards; each snapshot gets fresh ones, so readers need no locks. Open
+records are kept in a due-date ordered index so "upcoming in the next N days"
+and "overdue" are answered with a binary search instead of a full scan, and
+per-person debt balances are summed once at load time.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import dataclass, asdict, replace, fields
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+DEBT_TYPES = ("owe", "owed")
+
+
+def parse_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+@dataclass(frozen=True)
+class DebtRecord:
+    id: int
+    person: str
+    amount: float
+    type: str  # "owe" or "owed"
+    due_date: date
+    notes: str | None = None
+    settled: bool = False
+
+    def __post_init__(self):
+        if self.type not in DEBT_TYPES:
+            raise ValueError(f"Debt type must be one of {DEBT_TYPES}, got {self.type!r}")
+
+    @property
+    def due_key(self) -> Tuple[date, str]:
+        return (self.due_date, "")
+
+    def signed_amount(self) -> float:
+        """Positive when the person owes me, negative when I owe them."""
+        return self.amount if self.type == "owed" else -self.amount
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["due_date"] = self.due_date.isoformat()
+        return d
+
+
+@dataclass(frozen=True)
+class ReminderRecord:
+    id: int
+    title: str
+    date: date
+    time: str | None = None
+    Amount: float | None = None
+    notes: str | None = None
+    settled: bool = False
+
+    @property
+    def due_key(self) -> Tuple[date, str]:
+        return (self.date, self.time or "")
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d["date"] = self.date.isoformat()
+        return d
+
+
+class _DueDateStore:
+    """Records by ID plus a sorted (due_key, id) index over the open ones."""
+
+    record_cls = None
+    date_field = ""
+
+    def __init__(self):
+        self._records: Dict[int, object] = {}
+        self._open_index: List[Tuple[Tuple[date, str], int]] = []
+
+    def _coerce(self, values: dict) -> dict:
+        allowed = {f.name for f in fields(self.record_cls)} - {"id"}
+        unknown = set(values) - allowed
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+        if self.date_field in values:
+            values[self.date_field] = parse_date(values[self.date_field])
+        return values
+
+    def _aggregate(self, open_records: list):
+        """Subclass hook: derive aggregates from the open records after load()."""
+
+    # ---------- bulk load ----------
+    def load(self, rows: List[dict]):
+        """Replace the contents with externally stored rows (which carry their own ids)."""
+        records = {}
+        for row in rows:
+            row = dict(row)
+            rec = self.record_cls(id=row.pop("id"), **self._coerce(row))
+            records[rec.id] = rec
+        self._records = records
+        # One sort rather than an insort per row
+        self._open_index = sorted((rec.due_key, rec.id) for rec in records.values() if not rec.settled)
+        self._aggregate(self.open())
+
+    def prepare(self, record_id: int | None = None, **values):
+        """
+        Validate a new record (record_id None) or an update to an existing one
+        without applying it, e.g. before persisting it elsewhere.
+        """
+        if record_id is None:
+            return self.record_cls(id=0, **self._coerce(values))
+        return replace(self.get(record_id), **self._coerce(values))
+
+    def get(self, record_id: int):
+        rec = self._records.get(record_id)
+        if rec is None:
+            raise KeyError(record_id)
+        return rec
+
+    # ---------- queries ----------
+    def _slice(self, lo: int, hi: int) -> list:
+        return [self._records[rid] for _, rid in self._open_index[lo:hi]]
+
+    def open(self) -> list:
+        """Open records in due-date order."""
+        return self._slice(0, len(self._open_index))
+
+    def all(self, include_settled: bool = False) -> list:
+        if not include_settled:
+            return self.open()
+        return sorted(self._records.values(), key=lambda r: (r.due_key, r.id))
+
+    def upcoming(self, days: int, today: date | None = None) -> list:
+        """Open records due between today and today + days (inclusive)."""
+        today = today or date.today()
+        end = today + timedelta(days=days)
+        lo = bisect_left(self._open_index, ((today, ""), 0))
+        hi = bisect_left(self._open_index, ((end + timedelta(days=1), ""), 0))
+        return self._slice(lo, hi)
+
+    def overdue(self, today: date | None = None) -> list:
+        """Open records due before today."""
+        today = today or date.today()
+        hi = bisect_left(self._open_index, ((today, ""), 0))
+        return self._slice(0, hi)
+
+    def query(self, days: int | None = None, overdue: bool = False,
+              include_settled: bool = False, today: date | None = None) -> list:
+        """Shared window handling for the list endpoints."""
+        if overdue:
+            return self.overdue(today)
+        if days is not None:
+            return self.upcoming(days, today)
+        return self.all(include_settled)
+
+    def __len__(self):
+        return len(self._records)
+
+
+class DebtStore(_DueDateStore):
+    record_cls = DebtRecord
+    date_field = "due_date"
+
+    def __init__(self):
+        super().__init__()
+        self._balances: Dict[str, float] = {}
+        self._totals = {"owe": 0.0, "owed": 0.0}
+
+    def _aggregate(self, open_records: List[DebtRecord]):
+        balances: Dict[str, float] = {}
+        totals = {"owe": 0.0, "owed": 0.0}
+        for rec in open_records:
+            balances[rec.person] = balances.get(rec.person, 0.0) + rec.signed_amount()
+            totals[rec.type] += rec.amount
+        self._balances = {p: b for p, b in balances.items() if abs(b) >= 1e-9}
+        self._totals = totals
+
+    def balances(self) -> Dict[str, float]:
+        """Net open balance per person (positive: they owe me)."""
+        return dict(self._balances)
+
+    def totals(self) -> dict:
+        return {
+            "owe": self._totals["owe"],
+            "owed": self._totals["owed"],
+            "net": self._totals["owed"] - self._totals["owe"],
+        }
+
+
+class ReminderStore(_DueDateStore):
+    record_cls = ReminderRecord
+    date_field = "date"
@@ -0,0 +1,201 @@
+"""
+Headless report rendering for the Personal Expenditure Pattern Analyser.
+
+Builds the full chart set for a transactions frame (overall pie, per-month pies,
+monthly bars, per-category trends), renders it across a process pool with the
+Agg backend and skips charts whose inputs have not changed since the last run.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+import pandas as pd
+
+from expenditure_analyser import (
+    enrich_transactions,
+    draw_category_pie,
+    draw_monthly_bar,
+    draw_category_trends,
+)
+
+SUPPORTED_FORMATS = ("png", "svg")
+
+# Bump when the drawing code changes so cached charts are re-rendered
+RENDERER_VERSION = "1"
+
+CACHE_MANIFEST = ".render_cache.json"
+
+
+@dataclass
+class ReportConfig:
+    dpi: int = 100
+    fmt: str = "png"
+    month_format: str = "%Y-%m"
+    max_workers: int | None = None  # None -> os.cpu_count()
+    use_cache: bool = True
+
+    def __post_init__(self):
+        self.fmt = self.fmt.lower()
+        if self.fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported format {self.fmt!r}, expected one of {SUPPORTED_FORMATS}")
+
+
+@dataclass
+class ChartJob:
+    kind: str  # "pie", "bar" or "trend"
+    data: pd.DataFrame
+    path: Path
+    title: str
+    dpi: int
+    fmt: str
+    month_format: str
+    key: str = field(default="")
+
+    def fingerprint(self) -> str:
+        """Content hash of everything that affects the rendered output."""
+        h = hashlib.sha256()
+        for part in (RENDERER_VERSION, self.kind, self.title, str(self.dpi), self.fmt, self.month_format):
+            h.update(part.encode())
+            h.update(b"\0")
+        h.update(pd.util.hash_pandas_object(self.data, index=True).to_numpy().tobytes())
+        h.update(",".join(map(str, self.data.columns)).encode())
+        return h.hexdigest()
+
+
+# ---------- Chart inputs ----------
+def _expenses(df: pd.DataFrame) -> pd.DataFrame:
+    if "Type" not in df.columns:
+        df = enrich_transactions(df)
+    return df[df["Type"] == "Debit"]
+
+
+def _by_category(expenses: pd.DataFrame) -> pd.DataFrame:
+    return (expenses.groupby("Category")["AbsAmount"].sum()
+            .sort_values(ascending=False).reset_index())
+
+
+def build_chart_jobs(df: pd.DataFrame, out_dir: Path, config: ReportConfig) -> List[ChartJob]:
+    """Describe every chart of the report set without rendering anything."""
+    out_dir = Path(out_dir)
+    expenses = _expenses(df)
+    if expenses.empty:
+        return []
+
+    def job(kind, data, name, title):
+        return ChartJob(kind=kind, data=data, path=out_dir / f"{name}.{config.fmt}", title=title,
+                        dpi=config.dpi, fmt=config.fmt, month_format=config.month_format, key=name)
+
+    jobs = [job("pie", _by_category(expenses), "category_pie", "Expenses by Category")]
+
+    for month, group in expenses.groupby("Month"):
+        label = pd.Timestamp(month).strftime("%Y-%m")
+        jobs.append(job("pie", _by_category(group), f"category_pie_{label}",
+                        f"Expenses by Category ({label})"))
+
+    monthly = expenses.groupby("Month")["AbsAmount"].sum().reset_index()
+    jobs.append(job("bar", monthly, "monthly_bar", "Monthly Expenses"))
+
+    trends = expenses.pivot_table(index="Month", columns="Category", values="AbsAmount",
+                                  aggfunc="sum", fill_value=0).sort_index()
+    jobs.append(job("trend", trends, "category_trends", "Monthly Expenses by Category"))
+    for cat in trends.columns:
+        slug = "".join(c if c.isalnum() else "_" for c in str(cat).lower()).strip("_")
+        jobs.append(job("trend", trends[[cat]], f"trend_{slug}", f"Monthly Expenses: {cat}"))
+    return jobs
+
+
+# ---------- Rendering ----------
+def render_chart(job: ChartJob) -> str:
+    """Render one chart to disk. Top-level so it can run in a worker process."""
+    fig = Figure()
+    ax = fig.add_subplot()
+    if job.kind == "pie":
+        draw_category_pie(ax, job.data, job.title)
+    elif job.kind == "bar":
+        draw_monthly_bar(ax, job.data, job.title, job.month_format)
+    elif job.kind == "trend":
+        draw_category_trends(ax, job.data, job.title, job.month_format)
+    else:
+        raise ValueError(f"Unknown chart kind {job.kind!r}")
+    fig.tight_layout()
+    fig.savefig(job.path, dpi=job.dpi, format=job.fmt)
+    return str(job.path)
+
+
+def _load_manifest(out_dir: Path) -> Dict[str, str]:
+    try:
+        return json.loads((out_dir / CACHE_MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir: Path, manifest: Dict[str, str]):
+    tmp = out_dir / (CACHE_MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, out_dir / CACHE_MANIFEST)
+
+
+def _run_jobs(jobs: List[ChartJob], max_workers: int | None):
+    if not jobs:
+        return
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        for j in jobs:
+            render_chart(j)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first worker exception, if any
+        list(pool.map(render_chart, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def render_reports(reports: Dict[str, pd.DataFrame], out_dir: Path,
+                   config: ReportConfig | None = None) -> Dict[str, dict]:
+    """
+    Render report sets for several users in one process pool.
+    `reports` maps a user/report name to its transactions; each set is written
+    to out_dir/<name>/. Returns per-report lists of rendered and cached files.
+    """
+    config = config or ReportConfig()
+    out_dir = Path(out_dir)
+
+    pending: List[ChartJob] = []
+    summary: Dict[str, dict] = {}
+    manifests: Dict[Path, Dict[str, str]] = {}
+
+    for name, df in reports.items():
+        report_dir = out_dir / name
+        report_dir.mkdir(parents=True, exist_ok=True)
+        manifest = _load_manifest(report_dir) if config.use_cache else {}
+        rendered, cached = [], []
+        for j in build_chart_jobs(df, report_dir, config):
+            fp = j.fingerprint()
+            if config.use_cache and manifest.get(j.key) == fp and j.path.exists():
+                cached.append(str(j.path))
+                continue
+            manifest[j.key] = fp
+            pending.append(j)
+            rendered.append(str(j.path))
+        manifests[report_dir] = manifest
+        summary[name] = {"rendered": rendered, "cached": cached}
+
+    _run_jobs(pending, config.max_workers)
+
+    # Only record fingerprints once every chart has been written successfully
+    if config.use_cache:
+        for report_dir, manifest in manifests.items():
+            _save_manifest(report_dir, manifest)
+    return summary
+
+
+def render_report(df: pd.DataFrame, out_dir: Path, config: ReportConfig | None = None) -> dict:
+    """Render the full chart set for a single transactions frame into out_dir."""
+    out_dir = Path(out_dir)
+    return render_reports({out_dir.name: df}, out_dir.parent, config)[out_dir.name]
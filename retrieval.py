@@ -0,0 +1,345 @@
+"""
+Hybrid lexical + dense retrieval over the finance knowledge base.
+
+A BM25 inverted index is built once per knowledge-base rebuild. Queries are
+first parsed for structured filters (month/date, amount bounds, category),
+then scored lexically. When the query names a known merchant or person and
+the best lexical hit is about that entity, the dense embedding search is
+skipped entirely; otherwise both rankings are fused with reciprocal rank
+fusion.
+"""
+from __future__ import annotations
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no retrieval signal in finance questions
+STOPWORDS = {
+    "a", "an", "the", "to", "of", "on", "in", "at", "for", "by", "from", "and", "or",
+    "how", "much", "many", "what", "when", "who", "which", "does", "do", "did", "is",
+    "are", "was", "i", "me", "my", "mine", "we", "you", "spent", "spend",
+    "pay", "paid", "total", "all", "any", "show", "list", "tell", "about",
+}
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+AMOUNT_RE = re.compile(
+    r"\b(over|above|more than|greater than|at least|under|below|less than|at most)\s*(?:rs\.?|inr|₹)?\s*([\d,]+(?:\.\d+)?)",
+    re.I)
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+# Whole month names or abbreviations only: "Decathlon", "market" and "junk" aren't months
+MONTH_RE = re.compile(
+    r"\b(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b(?:\s+(\d{4}))?", re.I)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class KBDocument:
+    text: str
+    kind: str = ""                 # "Expense", "Debt" or "Reminder"
+    date: date | None = None
+    amount: float | None = None
+    category: str | None = None
+    entity: str | None = None      # merchant, person or reminder title
+
+
+# ---------- Structured filters ----------
+@dataclass
+class QueryFilters:
+    month: int | None = None
+    year: int | None = None
+    day: date | None = None
+    min_amount: float | None = None
+    max_amount: float | None = None
+    categories: Set[str] = field(default_factory=set)
+
+    def is_empty(self) -> bool:
+        return (self.month is None and self.year is None and self.day is None
+                and self.min_amount is None and self.max_amount is None and not self.categories)
+
+    def matches(self, doc: KBDocument) -> bool:
+        if self.day is not None and doc.date != self.day:
+            return False
+        if self.month is not None and (doc.date is None or doc.date.month != self.month):
+            return False
+        if self.year is not None and (doc.date is None or doc.date.year != self.year):
+            return False
+        if self.min_amount is not None and (doc.amount is None or abs(doc.amount) < self.min_amount):
+            return False
+        if self.max_amount is not None and (doc.amount is None or abs(doc.amount) > self.max_amount):
+            return False
+        # Debts and reminders have no category; a category narrows expenses only
+        if self.categories and doc.category is not None and doc.category.lower() not in self.categories:
+            return False
+        return True
+
+
+def parse_filters(query: str, categories: Iterable[str] = ()) -> QueryFilters:
+    """Pull date, amount and category constraints out of a free-text query."""
+    f = QueryFilters()
+    for op, value in AMOUNT_RE.findall(query):
+        amount = float(value.replace(",", ""))
+        if op.lower() in ("over", "above", "more than", "greater than", "at least"):
+            f.min_amount = amount
+        else:
+            f.max_amount = amount
+
+    m = ISO_DATE_RE.search(query)
+    if m:
+        try:
+            f.day = date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            pass  # "2025-02-30" is no day at all; don't filter on it
+    else:
+        m = MONTH_RE.search(query)
+        # "may" is too common an English word to treat as a month on its own
+        if m and (m.group(1).lower() != "may" or m.group(2)):
+            f.month = MONTHS[m.group(1).lower()[:3]]
+            if m.group(2):
+                f.year = int(m.group(2))
+
+    q_tokens = set(tokenize(query))
+    for cat in categories:
+        cat_tokens = set(tokenize(cat))
+        if cat_tokens and cat_tokens <= q_tokens:
+            f.categories.add(cat.lower())
+    return f
+
+
+# ---------- BM25 ----------
+class BM25Index:
+    """Okapi BM25 over pre-tokenized documents with postings lists."""
+
+    def __init__(self, docs: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(docs)
+        self.doc_len: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for doc_id, text in enumerate(docs):
+            tf = Counter(tokenize(text))
+            self.doc_len.append(sum(tf.values()))
+            for term, count in tf.items():
+                self.postings[term].append((doc_id, count))
+        self.avgdl = (sum(self.doc_len) / self.n_docs) if self.n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (self.n_docs - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def query_terms(self, query: str) -> List[str]:
+        return [t for t in dict.fromkeys(tokenize(query)) if t not in STOPWORDS and t in self.postings]
+
+    def score(self, terms: Sequence[str], allowed: Set[int] | None = None) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in terms:
+            idf = self.idf[term]
+            for doc_id, tf in self.postings[term]:
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = tf + k1 * (1 - b + b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (k1 + 1) / norm
+        return scores
+
+
+# ---------- Hybrid retriever ----------
+DenseSearch = Callable[[str, int], List[Tuple[int, float]]]
+
+
+@dataclass
+class RetrievalResult:
+    doc_ids: List[int]
+    documents: List[str]
+    used_dense: bool
+    filters: QueryFilters
+
+
+class HybridRetriever:
+    """
+    `dense_search(query, n)` must return up to n (doc_id, score) pairs, best
+    first, where doc_id is the position of the document in `docs`.
+    """
+
+    def __init__(self, docs: Sequence[KBDocument], dense_search: DenseSearch | None = None,
+                 top_k: int = 2, entity_shortcut: bool = True, rrf_k: int = 60,
+                 lexical_weight: float = 1.0, dense_weight: float = 1.0):
+        self.docs = list(docs)
+        self.dense_search = dense_search
+        self.top_k = top_k
+        self.entity_shortcut = entity_shortcut
+        self.rrf_k = rrf_k
+        self.lexical_weight = lexical_weight
+        self.dense_weight = dense_weight
+        self.index = BM25Index([d.text for d in self.docs])
+        self.categories = sorted({d.category for d in self.docs if d.category})
+        # Known merchants/people/titles by lowercased name, with the tokens a query must contain
+        self.entities = {e.lower(): set(tokenize(e)) for d in self.docs
+                         if (e := d.entity) and tokenize(e)}
+        self.dense_calls = 0
+
+    def _is_confident(self, query: str, ranked: List[Tuple[int, float]]) -> bool:
+        """
+        Lexical results are trusted when the query names a known entity (a
+        merchant, person or reminder title, as a whole) and the best hit is a
+        document about that entity — the case dense retrieval handles worst.
+        Unlike an idf threshold this doesn't depend on how common the name is:
+        a merchant on 40% of rows is still an exact match.
+        """
+        if not self.entity_shortcut or not ranked:
+            return False
+        best = self.docs[ranked[0][0]].entity
+        if not best:
+            return False
+        q_tokens = set(tokenize(query))
+        toks = self.entities.get(best.lower())
+        return toks is not None and toks <= q_tokens
+
+    def search(self, query: str, top_k: int | None = None) -> RetrievalResult:
+        top_k = top_k or self.top_k
+        filters = parse_filters(query, self.categories)
+        allowed = None
+        if not filters.is_empty():
+            allowed = {i for i, d in enumerate(self.docs) if filters.matches(d)}
+
+        terms = self.index.query_terms(query)
+        lexical = sorted(self.index.score(terms, allowed).items(), key=lambda kv: (-kv[1], kv[0]))
+
+        if self._is_confident(query, lexical) or self.dense_search is None:
+            ids = [i for i, _ in lexical[:top_k]]
+            if not ids and allowed:
+                # Pure structured queries ("expenses over 1000 in aug") may have no lexical hits
+                ids = sorted(allowed)[:top_k]
+            return RetrievalResult(ids, [self.docs[i].text for i in ids], False, filters)
+
+        # Over-fetch so post-filtering still leaves enough dense candidates
+        n_dense = len(self.docs) if allowed is not None else top_k * 4
+        self.dense_calls += 1
+        dense = [(i, s) for i, s in self.dense_search(query, n_dense)
+                 if allowed is None or i in allowed]
+
+        fused: Dict[int, float] = defaultdict(float)
+        for rank, (i, _) in enumerate(lexical):
+            fused[i] += self.lexical_weight / (self.rrf_k + rank + 1)
+        for rank, (i, _) in enumerate(dense):
+            fused[i] += self.dense_weight / (self.rrf_k + rank + 1)
+        ids = [i for i, _ in sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]]
+        return RetrievalResult(ids, [self.docs[i].text for i in ids], True, filters)
+
+
+# ---------- Evaluation ----------
+def evaluate(retriever: HybridRetriever, labelled: Sequence[Tuple[str, Set[int]]],
+             top_k: int | None = None) -> dict:
+    """
+    Recall@k and latency over (query, relevant doc ids) pairs. Recall is the
+    share of relevant documents found in the top k, capped at k when more
+    than k documents are relevant.
+    """
+    k = top_k or retriever.top_k
+    recalls, latencies, dense_used = [], [], 0
+    for query, relevant in labelled:
+        start = time.perf_counter()
+        res = retriever.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        dense_used += res.used_dense
+        if relevant:
+            recalls.append(len(relevant & set(res.doc_ids)) / min(len(relevant), k))
+    latencies.sort()
+    return {
+        "queries": len(labelled),
+        "recall": sum(recalls) / len(recalls) if recalls else 0.0,
+        "latency_ms_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+        "latency_ms_p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        "dense_calls": dense_used,
+    }
+
+
+def _sample_kb() -> Tuple[List[KBDocument], List[Tuple[str, Set[int]]]]:
+    """
+    Small synthetic knowledge base with labelled queries. Relevance comes from
+    the ground-truth entity each document was generated for, not from the
+    document text, and about half the queries are paraphrases that share no
+    words with the documents they should find.
+    """
+    merchants = [("Swiggy", "Food"), ("Zomato", "Food"), ("Amazon", "Shopping"), ("Uber", "Travel"),
+                 ("Netflix", "Entertainment"), ("Airtel", "Bills"), ("Flipkart", "Shopping")]
+    docs: List[KBDocument] = []
+    entity: List[str] = []  # ground truth, parallel to docs
+    for month in range(1, 13):
+        for j, (m, cat) in enumerate(merchants):
+            amount = float(100 + 37 * j + 11 * month)
+            d = date(2025, month, 1 + (j * 3) % 27)
+            docs.append(KBDocument(f"Expense: Spent {-amount} on Paid to {m} UPI ({cat}) on {d}",
+                                   "Expense", d, amount, cat, m))
+            entity.append(m)
+    for person, amount, kind in [("John", 500.0, "owed"), ("Priya", 1200.0, "owe"), ("Ravi", 300.0, "owed")]:
+        d = date(2025, 11, 15)
+        text = (f"Debt: I owe {amount} to {person} due on {d}" if kind == "owe"
+                else f"Debt: {person} owes me {amount} due on {d}")
+        docs.append(KBDocument(text, "Debt", d, amount, entity=person))
+        entity.append(f"debt:{person}:{kind}")
+    docs.append(KBDocument("Reminder: Rent of 15000.0 on 2025-11-01 at 10:00", "Reminder", date(2025, 11, 1), 15000.0,
+                           entity="Rent"))
+    entity.append("rent")
+
+    def ids(*entities, month=None, min_amount=None):
+        return {i for i, (d, e) in enumerate(zip(docs, entity))
+                if any(e == x or e.startswith(x + ":") for x in entities)
+                and (month is None or d.date.month == month)
+                and (min_amount is None or d.amount > min_amount)}
+
+    labelled = [
+        # exact names: lexical should answer these without the dense search
+        ("how much to Swiggy", ids("Swiggy")),
+        ("what does John owe", ids("debt:John")),
+        ("how much do I owe Priya", ids("debt:Priya")),
+        ("Netflix in march", ids("Netflix", month=3)),
+        ("shopping over 400", ids("Amazon", "Flipkart", min_amount=400)),
+        ("when is my rent due", ids("rent")),
+        # paraphrases: no query word appears in the relevant documents
+        ("dinner and takeaway orders", ids("Swiggy", "Zomato")),
+        ("cab rides", ids("Uber")),
+        ("streaming subscriptions", ids("Netflix")),
+        ("phone recharge", ids("Airtel")),
+        ("e-commerce purchases", ids("Amazon", "Flipkart")),
+        ("money friends have to return", ids("debt:John:owed", "debt:Ravi:owed")),
+    ]
+    return docs, labelled
+
+
+if __name__ == "__main__":
+    docs, labelled = _sample_kb()
+    lexical_only = HybridRetriever(docs, dense_search=None, top_k=5)
+    print("lexical only:", evaluate(lexical_only, labelled))
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        raise SystemExit("sentence-transformers not installed; skipping dense/hybrid comparison")
+
+    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    doc_emb = model.encode([d.text for d in docs], normalize_embeddings=True)
+
+    def dense(query: str, n: int):
+        q = model.encode([query], normalize_embeddings=True)[0]
+        scores = doc_emb @ q
+        order = scores.argsort()[::-1][:n]
+        return [(int(i), float(scores[i])) for i in order]
+
+    dense_only = HybridRetriever(docs, dense_search=dense, top_k=5, entity_shortcut=False,
+                                 lexical_weight=0.0)
+    print("dense only:  ", evaluate(dense_only, labelled))
+    print("hybrid:      ", evaluate(HybridRetriever(docs, dense_search=dense, top_k=5), labelled))
+    print("no shortcut: ", evaluate(HybridRetriever(docs, dense_search=dense, top_k=5,
+                                                    entity_shortcut=False), labelled))
@@ -0,0 +1,196 @@
+"""
+SQLite-backed storage shared by every uvicorn worker process.
+
+The database runs in WAL mode so readers never block the single writer, and
+every write transaction bumps a version counter in the `meta` table. Workers
+keep their DataFrames/indexes as a local cache and only reload them when
+`version()` differs from the version they last loaded — a single-row read.
+
+Transactions are append-only, so a worker that already holds rows up to some
+id only reads the rows after it.
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+TRANSACTION_COLUMNS = ["Date", "Amount", "Category", "Description", "Payment_method", "Merchant", "Transaction_id"]
+DEBT_COLUMNS = ["person", "amount", "type", "due_date", "notes", "settled"]
+REMINDER_COLUMNS = ["title", "date", "time", "Amount", "notes", "settled"]
+
+TABLE_COLUMNS = {"debts": DEBT_COLUMNS, "reminders": REMINDER_COLUMNS}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    Date TEXT, Amount REAL, Category TEXT, Description TEXT, Payment_method TEXT, Merchant TEXT,
+    Transaction_id TEXT
+);
+-- Statement rows are unique by bank transaction ID; manual entries have none (NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS transactions_txn_id ON transactions (Transaction_id);
+CREATE TABLE IF NOT EXISTS debts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person TEXT NOT NULL, amount REAL NOT NULL, type TEXT NOT NULL, due_date TEXT NOT NULL,
+    notes TEXT, settled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL, date TEXT NOT NULL, time TEXT, Amount REAL,
+    notes TEXT, settled INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _to_sql(value):
+    """Dates to ISO strings, NaN/NaT to NULL, numpy scalars to Python."""
+    if value is None:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value.item() if hasattr(value, "item") else value
+
+
+def _iso_date(value):
+    """
+    Any date the app produces ("Aug 31, 2025", "2025-09-15", Timestamp) as
+    YYYY-MM-DD, so the stored column has one format that enrich_transactions
+    parses for every row. Unparseable dates ("Feb 30, 2025") are stored as
+    NULL, which is how they would be read back anyway.
+    """
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class StoredState:
+    version: int
+    # `transactions` holds the rows with after_id < id <= last_id
+    after_id: int
+    last_id: int
+    transactions: pd.DataFrame
+    debts: List[dict]
+    reminders: List[dict]
+
+
+class SharedStorage:
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._local = threading.local()
+        # Idempotent, so every worker can run it at startup
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    # ---------- connections ----------
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections must not be shared."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Serialized write transaction that bumps the shared version on commit."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def version(self) -> int:
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    # ---------- reads ----------
+    def snapshot(self, after_id: int = 0) -> StoredState:
+        """
+        Everything read in one consistent transaction. Pass the last
+        transaction id of a previous read to get only the transactions added
+        since (rows are never updated or deleted).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+            transactions = pd.read_sql_query(
+                f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions WHERE id > ? ORDER BY id",
+                conn, params=(after_id,))
+            # An empty result has no values to infer REAL from
+            transactions["Amount"] = transactions["Amount"].astype(float)
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+            debts = self._rows(conn, "debts")
+            reminders = self._rows(conn, "reminders")
+        finally:
+            conn.execute("COMMIT")
+        return StoredState(version, after_id, last_id, transactions, debts, reminders)
+
+    @staticmethod
+    def _rows(conn, table: str) -> List[dict]:
+        cols = ["id"] + TABLE_COLUMNS[table]
+        rows = conn.execute(f"SELECT {', '.join(cols)} FROM {table} ORDER BY id").fetchall()
+        out = []
+        for row in rows:
+            d = dict(zip(cols, row))
+            d["settled"] = bool(d["settled"])
+            out.append(d)
+        return out
+
+    # ---------- transactions ----------
+    def append_transactions(self, df: pd.DataFrame) -> int:
+        """
+        Insert rows, silently skipping any whose Transaction_id is already
+        stored. Returns the number of rows actually inserted.
+        """
+        df = df.assign(Date=df["Date"].map(_iso_date))
+        rows = [tuple(_to_sql(r.get(c)) for c in TRANSACTION_COLUMNS) for r in df.to_dict(orient="records")]
+        with self._write() as conn:
+            cur = conn.executemany(
+                f"INSERT OR IGNORE INTO transactions ({', '.join(TRANSACTION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(TRANSACTION_COLUMNS))})", rows)
+            return cur.rowcount
+
+    # ---------- debts / reminders ----------
+    def insert(self, table: str, values: Dict) -> int:
+        cols = [c for c in TABLE_COLUMNS[table] if c in values]
+        with self._write() as conn:
+            cur = conn.execute(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                [_to_sql(values[c]) for c in cols])
+            return cur.lastrowid
+
+    def update(self, table: str, record_id: int, values: Dict):
+        cols = [c for c in TABLE_COLUMNS[table] if c in values]
+        with self._write() as conn:
+            conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in cols)} WHERE id = ?",
+                [_to_sql(values[c]) for c in cols] + [record_id])
+
+    def delete(self, table: str, record_id: int):
+        with self._write() as conn:
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
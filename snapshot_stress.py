@@ -0,0 +1,151 @@
+"""
+Concurrency check for the snapshot isolation in backend_api.
+
+Reader threads hammer /analyse and retrieve_context while writer threads run
+upload_pdf, add_transaction and add_debt. Every snapshot a reader gets must be
+internally consistent: the frames, the precomputed aggregates, the knowledge
+base and the retriever all describe the same data, and no reader ever sees
+the version go backwards.
+
+Runs against a throwaway database and statement cache:
+    python snapshot_stress.py [seconds] [reader_threads]
+Exits non-zero and prints the first failures if any check fails.
+"""
+from __future__ import annotations
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+QUERIES = ["how much to Swiggy", "what does John owe", "cab rides", "total spending in aug"]
+
+
+def check_snapshot(api, snap, query: str):
+    n = len(snap.transactions)
+    assert len(snap.clean) == n, f"clean frame has {len(snap.clean)} rows, transactions {n}"
+    assert snap.analysis["overall"]["Transactions"] == n, "aggregates built from a different frame"
+    assert len(snap.transaction_ids) == snap.transactions["Transaction_id"].nunique(), \
+        "transaction ID set out of step with the frame"
+    expected_kb = n + len(snap.debts.open()) + len(snap.reminders.open())
+    assert len(snap.kb) == expected_kb, f"knowledge base has {len(snap.kb)} docs, expected {expected_kb}"
+    texts = [d.text for d in snap.kb]
+    assert [d.text for d in snap.retriever.docs] == texts, "retriever indexes a different knowledge base"
+    retrieved = api.retrieve_context(query, snap=snap)
+    assert set(retrieved) <= set(texts), "retrieved documents missing from the snapshot"
+
+
+def check_analysis(result: dict):
+    # by_category sums AbsAmount over all rows, i.e. total income + total expense
+    overall = result["overall"]
+    total = sum(result["by_category"].values())
+    assert math.isclose(total, overall["Total Income"] + overall["Total Expense"], rel_tol=1e-6, abs_tol=1e-6), \
+        "by_category and overall disagree"
+
+
+def main(duration: float = 20.0, readers: int = 8) -> int:
+    tmp = tempfile.mkdtemp(prefix="snapshot_stress_")
+    os.environ["FINANCE_DB_PATH"] = os.path.join(tmp, "finance.db")
+    os.environ["STATEMENT_CACHE_DIR"] = os.path.join(tmp, "statement_cache")
+
+    import backend_api as api
+    from fastapi import UploadFile
+
+    errors: list = []
+    counts = {"reads": 0, "writes": 0}
+    counts_lock = threading.Lock()
+    stop = threading.Event()
+
+    def record(exc: BaseException, where: str):
+        with counts_lock:
+            errors.append(f"{where}: {exc!r}")
+        stop.set()
+
+    def bump(key: str):
+        with counts_lock:
+            counts[key] += 1
+
+    def reader(idx: int):
+        last_version = -1
+        i = 0
+        while not stop.is_set():
+            try:
+                snap = api.current_snapshot()
+                assert snap.version >= last_version, "snapshot version went backwards"
+                last_version = snap.version
+                check_snapshot(api, snap, QUERIES[i % len(QUERIES)])
+                check_analysis(api.analyse_transactions())
+                bump("reads")
+            except BaseException as e:
+                record(e, f"reader {idx}")
+            i += 1
+
+    def upload_writer():
+        sample = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "sample.pdf")
+        with open(sample, "rb") as f:
+            data = f.read()
+        # The second upload is a no-op (every transaction ID already stored)
+        for _ in range(2):
+            if stop.is_set():
+                return
+            try:
+                api.upload_pdf(UploadFile(file=BytesIO(data), filename="sample.pdf"))
+                bump("writes")
+            except BaseException as e:
+                record(e, "upload_pdf")
+
+    def transaction_writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                res = api.add_transaction(api.TransactionIn(
+                    Date=f"2025-09-{1 + i % 28:02d}", Description=f"Paid to Swiggy UPI {i}",
+                    Amount=-(100 + i), Payment_method="UPI"))
+                assert res["status"] == "success", res
+                bump("writes")
+            except BaseException as e:
+                record(e, "add_transaction")
+            i += 1
+
+    def debt_writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                api.add_debt(api.Debt(person=f"Friend{i % 5}", amount=50 + i,
+                                      type="owed" if i % 2 else "owe", due_date=f"2025-10-{1 + i % 28:02d}"))
+                bump("writes")
+            except BaseException as e:
+                record(e, "add_debt")
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(readers)]
+    threads += [threading.Thread(target=w, daemon=True)
+                for w in (upload_writer, transaction_writer, debt_writer)]
+    for t in threads:
+        t.start()
+    stop.wait(duration)
+    stop.set()
+    for t in threads:
+        t.join(timeout=60)
+
+    final = api.sync_state()
+    try:
+        check_snapshot(api, final, QUERIES[0])
+    except BaseException as e:
+        errors.append(f"final snapshot: {e!r}")
+
+    print(f"{counts['reads']} consistent reads, {counts['writes']} writes, "
+          f"final version {final.version} with {len(final.transactions)} transactions")
+    if errors:
+        print(f"{len(errors)} failure(s):")
+        for err in errors[:20]:
+            print("  ", err)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sys.exit(main(float(args[0]) if args else 20.0, int(args[1]) if len(args) > 1 else 8))
@@ -0,0 +1,145 @@
+"""
+On-disk cache of parsed bank statements.
+
+Entries are keyed by the SHA-256 of the uploaded bytes (whole files) or of a
+page's content streams and resources (single pages), always combined with the parser
+version so that a parser change invalidates everything it produced. Each entry
+is a compressed .npz file with one array per column, plus the malformed lines
+the parser reported. The directory is shared
+by all workers; writes are atomic and the least recently used entries are
+evicted once the total size exceeds `max_bytes`.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from statement_parser import COLUMNS, PARSER_VERSION
+
+STRING_COLUMNS = [c for c in COLUMNS if c != "Amount"]
+
+
+class StatementCache:
+    def __init__(self, directory: str | Path, max_bytes: int = 64 * 2**20,
+                 parser_version: str = PARSER_VERSION):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "page_hits": 0, "page_misses": 0, "evictions": 0}
+
+    # ---------- keys ----------
+    def file_key(self, contents: bytes) -> str:
+        return "file-" + hashlib.sha256(contents).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"v{self.parser_version}-{key}.npz"
+
+    # ---------- public API ----------
+    # Entries are (rows DataFrame, malformed lines) pairs as produced by the parser
+    def get_file(self, contents: bytes) -> Tuple[pd.DataFrame, list] | None:
+        return self._get(self.file_key(contents), "hits", "misses")
+
+    def put_file(self, contents: bytes, df: pd.DataFrame, malformed: list):
+        self._put(self.file_key(contents), df, malformed)
+
+    def get_page(self, page_key: str) -> Tuple[pd.DataFrame, list] | None:
+        return self._get("page-" + page_key, "page_hits", "page_misses")
+
+    def put_page(self, page_key: str, df: pd.DataFrame, malformed: list):
+        self._put("page-" + page_key, df, malformed)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        # Whole-file and per-page lookups are separate: a changed file misses
+        # as a file but may still hit on most of its pages
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        page_lookups = stats["page_hits"] + stats["page_misses"]
+        stats["page_hit_rate"] = stats["page_hits"] / page_lookups if page_lookups else 0.0
+        entries = list(self.directory.glob("*.npz"))
+        stats["entries"] = len(entries)
+        stats["bytes"] = sum(_size(p) for p in entries)
+        stats["parser_version"] = self.parser_version
+        return stats
+
+    # ---------- storage ----------
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _get(self, key: str, hit: str, miss: str) -> Tuple[pd.DataFrame, list] | None:
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if str(z["__parser_version__"]) != self.parser_version:
+                    raise ValueError("stale parser version")
+                df = pd.DataFrame({c: z[c] for c in COLUMNS})
+                malformed = []
+                for page, line, reason in zip(z["__malformed_page__"], z["__malformed_line__"],
+                                              z["__malformed_reason__"]):
+                    m = {"line": str(line), "reason": str(reason)}
+                    malformed.append({"page": int(page), **m} if page >= 0 else m)
+        except (OSError, KeyError, ValueError):
+            self._count(miss)
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        df[STRING_COLUMNS] = df[STRING_COLUMNS].astype(object)
+        self._count(hit)
+        return df, malformed
+
+    def _put(self, key: str, df: pd.DataFrame, malformed: list):
+        arrays = {c: df[c].astype(str).to_numpy(dtype=str) for c in STRING_COLUMNS}
+        arrays["Amount"] = df["Amount"].to_numpy(dtype=np.float64)
+        arrays["__parser_version__"] = np.array(self.parser_version)
+        # Page-level entries have no page number (the page may move); stored as -1
+        arrays["__malformed_page__"] = np.array([m.get("page", -1) for m in malformed], dtype=np.int64)
+        arrays["__malformed_line__"] = np.array([m["line"] for m in malformed], dtype=str)
+        arrays["__malformed_reason__"] = np.array([m["reason"] for m in malformed], dtype=str)
+        tmp = self.directory / f".{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for p in self.directory.glob("*.npz"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        # Oldest first; also drops entries left behind by older parser versions
+        current = f"v{self.parser_version}-"
+        entries.sort(key=lambda e: (e[2].name.startswith(current), e[0]))
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            self._count("evictions")
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
@@ -0,0 +1,308 @@
+"""
+Pluggable vector stores for the finance knowledge base.
+
+`NumpyFlatIndex` keeps every embedding in one contiguous matrix (normalized
+float32, or int8 with a per-row scale) and answers queries with a single
+matrix product, optionally memory-mapped from disk. `ChromaVectorStore` wraps
+the previous in-memory Chroma collection. Pick one with `make_vector_store`
+(or the VECTOR_STORE environment variable in the backend).
+
+Run `python vector_store.py` to compare build time, query latency and memory.
+"""
+from __future__ import annotations
+import json
+import time
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+Hit = Tuple[int, float]
+
+
+class VectorStore(ABC):
+    """Documents are addressed by their position in the list passed to rebuild()."""
+
+    @abstractmethod
+    def rebuild(self, texts: Sequence[str], embeddings: np.ndarray):
+        ...
+
+    @abstractmethod
+    def search_batch(self, queries: np.ndarray, n: int) -> List[List[Hit]]:
+        """Top-n (doc_id, score) pairs per query row, best first."""
+
+    def search(self, query: np.ndarray, n: int) -> List[Hit]:
+        return self.search_batch(np.asarray(query).reshape(1, -1), n)[0]
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def documents(self, ids: Sequence[int]) -> List[str]:
+        return [self.texts[i] for i in ids]
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _top_n(scores: np.ndarray, n: int) -> List[List[Hit]]:
+    n = min(n, scores.shape[1])
+    if n == 0:
+        return [[] for _ in range(scores.shape[0])]
+    # argpartition is O(N) per row; only the n winners are sorted
+    idx = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=1)
+    part = np.take_along_axis(part, order, axis=1)
+    return [[(int(i), float(s)) for i, s in zip(ri, rs)] for ri, rs in zip(idx, part)]
+
+
+class NumpyFlatIndex(VectorStore):
+    """Exact cosine-similarity search over a contiguous embedding matrix."""
+
+    # Rows quantized, or widened back to float32 for scoring, per step (~1.5 MB at 384 dims)
+    chunk_rows = 1024
+
+    def __init__(self, quantize: bool = False):
+        self.quantize = quantize
+        self.texts: List[str] = []
+        self.matrix = np.zeros((0, 0), dtype=np.int8 if quantize else np.float32)
+        self.scales = np.zeros(0, dtype=np.float32)
+
+    def rebuild(self, texts: Sequence[str], embeddings: np.ndarray):
+        self.texts = list(texts)
+        if not self.texts:
+            self.matrix = self.matrix[:0]
+            self.scales = self.scales[:0]
+            return
+        emb = np.asarray(embeddings).reshape(len(self.texts), -1)
+        if self.quantize:
+            # Symmetric per-row int8: row ~= matrix[row] * scales[row]. Done in
+            # blocks so float temporaries stay chunk-sized, not matrix-sized
+            self.matrix = np.empty(emb.shape, dtype=np.int8)
+            self.scales = np.empty(len(emb), dtype=np.float32)
+            for lo in range(0, len(emb), self.chunk_rows):
+                hi = lo + self.chunk_rows
+                block = _normalize(emb[lo:hi])
+                scales = np.abs(block).max(axis=1) / 127.0
+                scales[scales == 0] = 1.0
+                self.matrix[lo:hi] = np.round(block / scales[:, None])
+                self.scales[lo:hi] = scales
+        else:
+            self.matrix = _normalize(emb)
+            self.scales = np.ones(len(self.texts), dtype=np.float32)
+
+    def search_batch(self, queries: np.ndarray, n: int) -> List[List[Hit]]:
+        queries = _normalize(np.atleast_2d(queries))
+        if self.count() == 0:
+            return [[] for _ in range(len(queries))]
+        if self.quantize:
+            # Widen one block of rows at a time: a float copy of the whole matrix
+            # per query would cost as much memory and time as the float32 store
+            scores = np.empty((len(queries), self.count()), dtype=np.float32)
+            for lo in range(0, self.count(), self.chunk_rows):
+                hi = lo + self.chunk_rows
+                block = self.matrix[lo:hi].astype(np.float32)
+                scores[:, lo:hi] = (queries @ block.T) * self.scales[lo:hi]
+        else:
+            scores = queries @ self.matrix.T
+        return _top_n(scores, n)
+
+    def count(self) -> int:
+        return len(self.texts)
+
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.scales.nbytes
+
+    # ---------- persistence ----------
+    def save(self, path: Path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "matrix.npy", self.matrix)
+        np.save(path / "scales.npy", self.scales)
+        (path / "texts.json").write_text(json.dumps({"quantize": self.quantize, "texts": self.texts}))
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "NumpyFlatIndex":
+        """Load a saved index; with mmap the matrix is paged in from disk on demand."""
+        path = Path(path)
+        meta = json.loads((path / "texts.json").read_text())
+        index = cls(quantize=meta["quantize"])
+        index.texts = meta["texts"]
+        mode = "r" if mmap else None
+        index.matrix = np.load(path / "matrix.npy", mmap_mode=mode)
+        index.scales = np.load(path / "scales.npy", mmap_mode=mode)
+        return index
+
+
+def _drop_collection(client, name: str):
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+
+
+class ChromaVectorStore(VectorStore):
+    """In-memory Chroma collection behind the same interface."""
+
+    def __init__(self, name: str | None = None):
+        import chromadb
+        # Unique per instance: the in-memory client is process-wide, and a new
+        # snapshot's store must not drop the collection an older one still serves
+        self.name = name or f"finance_{uuid.uuid4().hex}"
+        self.client = chromadb.Client()
+        self.collection = self.client.get_or_create_collection(self.name)
+        self.texts: List[str] = []
+        weakref.finalize(self, _drop_collection, self.client, self.name)
+
+    def rebuild(self, texts: Sequence[str], embeddings: np.ndarray):
+        self.client.delete_collection(self.name)
+        self.collection = self.client.create_collection(self.name)
+        self.texts = list(texts)
+        if self.texts:
+            self.collection.add(documents=self.texts,
+                                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+                                ids=[str(i) for i in range(len(self.texts))])
+
+    def search_batch(self, queries: np.ndarray, n: int) -> List[List[Hit]]:
+        n = min(n, self.count())
+        if n == 0:
+            return [[] for _ in range(len(queries))]
+        results = self.collection.query(query_embeddings=np.atleast_2d(queries).tolist(), n_results=n)
+        # Chroma returns distances; negate so that higher is better like the other stores
+        return [[(int(i), -float(d)) for i, d in zip(ids, dists)]
+                for ids, dists in zip(results["ids"], results["distances"])]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+def make_vector_store(kind: str = "numpy") -> VectorStore:
+    kind = kind.lower()
+    if kind == "numpy":
+        return NumpyFlatIndex()
+    if kind in ("numpy-int8", "int8"):
+        return NumpyFlatIndex(quantize=True)
+    if kind == "chroma":
+        return ChromaVectorStore()
+    raise ValueError(f"Unknown vector store {kind!r}, expected numpy, numpy-int8 or chroma")
+
+
+# ---------- Benchmark ----------
+def _peak_rss_mb() -> float:
+    import resource
+    import sys
+    # Linux keeps ru_maxrss across exec, so a spawned child would start at its
+    # parent's peak; VmHWM belongs to the current process image only
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB on Linux
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _random_unit_rows(rng, n: int, dim: int, chunk: int = 1024) -> np.ndarray:
+    """Normalized float32 rows, generated in blocks so no float64 or full-size temporary exists."""
+    out = np.empty((n, dim), dtype=np.float32)
+    for lo in range(0, n, chunk):
+        block = rng.standard_normal((min(chunk, n - lo), dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        out[lo:lo + len(block)] = block
+    return out
+
+
+def _benchmark_one(kind: str, n_docs: int, dim: int, n_queries: int, k: int, seed: int,
+                   truth: List[List[int]]) -> dict:
+    """
+    Runs in a fresh process so peak RSS covers native (e.g. Chroma HNSW) memory
+    too. ru_maxrss only ever rises, so the baseline is taken before any data
+    exists, and the data itself is built without temporaries larger than it:
+    otherwise its high-water mark would hide everything the store allocates.
+    """
+    base_mb = _peak_rss_mb()
+    rng = np.random.default_rng(seed)
+    # Normalized, so Chroma's default L2 ranking matches cosine similarity
+    emb = _random_unit_rows(rng, n_docs, dim)
+    queries = rng.standard_normal((n_queries, dim), dtype=np.float32)
+    texts = [f"doc {i}" for i in range(n_docs)]
+    data_mb = _peak_rss_mb()
+
+    try:
+        if kind == "chroma":
+            import chromadb  # noqa: F401  (counted separately from the index itself)
+    except ImportError as e:
+        return {"skipped": str(e)}
+    import_mb = _peak_rss_mb()
+
+    start = time.perf_counter()
+    store = make_vector_store(kind)
+    store.rebuild(texts, emb)
+    build_s = time.perf_counter() - start
+    del emb
+    build_mb = _peak_rss_mb()
+
+    start = time.perf_counter()
+    single = [store.search(q, k) for q in queries]
+    single_ms = (time.perf_counter() - start) * 1000 / n_queries
+    start = time.perf_counter()
+    store.search_batch(queries, k)
+    batch_ms = (time.perf_counter() - start) * 1000 / n_queries
+    query_mb = _peak_rss_mb()
+
+    recall = np.mean([len(set(t) & {i for i, _ in hits}) / k for t, hits in zip(truth, single)])
+    return {
+        "build_s": round(build_s, 4),
+        "query_ms": round(single_ms, 4),
+        "batched_query_ms": round(batch_ms, 4),
+        # size of the stored index itself (not measurable for Chroma)
+        "index_mb": round(store.nbytes() / 2**20, 1) if isinstance(store, NumpyFlatIndex) else None,
+        # growth of peak RSS at each stage, in MiB
+        "data_mb": round(data_mb - base_mb, 1),
+        "import_mb": round(import_mb - data_mb, 1),
+        "build_peak_mb": round(build_mb - import_mb, 1),
+        "query_peak_mb": round(query_mb - build_mb, 1),
+        "recall_at_k": round(float(recall), 3),
+    }
+
+
+def benchmark(kinds=("numpy", "numpy-int8", "chroma"), n_docs: int = 5000, dim: int = 384,
+              n_queries: int = 200, k: int = 5, seed: int = 0) -> dict:
+    """
+    Build time, per-query latency, index size, peak RSS growth and recall on
+    random MiniLM-sized embeddings, each store measured in its own spawned
+    process.
+    """
+    import multiprocessing as mp
+    # Same data as each child generates from the seed
+    rng = np.random.default_rng(seed)
+    emb = _random_unit_rows(rng, n_docs, dim)
+    queries = rng.standard_normal((n_queries, dim), dtype=np.float32)
+    exact = NumpyFlatIndex()
+    exact.rebuild([""] * n_docs, emb)
+    truth = [[i for i, _ in hits] for hits in exact.search_batch(queries, k)]
+    del exact, emb
+
+    ctx = mp.get_context("spawn")
+    report = {}
+    for kind in kinds:
+        with ctx.Pool(1) as pool:
+            report[kind] = pool.apply(_benchmark_one, (kind, n_docs, dim, n_queries, k, seed, truth))
+    return report
+
+
+if __name__ == "__main__":
+    for kind, stats in benchmark().items():
+        print(f"{kind:>11}: {stats}")